@@ -5,9 +5,20 @@ import re
 import random
 import os
 import json
+import logging
+import threading
 import boto3
 from botocore.config import Config
-from collections import deque
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 # =============================================
 # ENVIRONMENT VARIABLES CONFIGURATION
@@ -26,20 +37,99 @@ DEBUG_MODE = os.getenv('DEBUG_MODE', 'False').lower() == 'true'
 REFRESH_INTERVAL = int(os.getenv('REFRESH_INTERVAL', '30'))  # Increased for stability
 MAX_SIGNALS_HISTORY = int(os.getenv('MAX_SIGNALS_HISTORY', '100'))
 MAX_SIGNALS_DISPLAY = int(os.getenv('MAX_SIGNALS_DISPLAY', '20'))
+MAX_SIGNAL_LENGTH = int(os.getenv('MAX_SIGNAL_LENGTH', '2000'))  # Chars per signal block
+MAX_SIGNAL_SEGMENTS = int(os.getenv('MAX_SIGNAL_SEGMENTS', '32'))  # R2 objects before compaction
 
 # Bot Configuration
 TELEGRAM_BOT_NAME = os.getenv('TELEGRAM_BOT_NAME', 'ETHGPT60s_bot')
 ANALYSIS_WINDOW = int(os.getenv('ANALYSIS_WINDOW', '5'))
 
 # Betting Configuration
-BET_MULTIPLIERS = [1.0, 2.5, 6.25, 15.63, 39.08, 97.62, 244.05, 610.12]
+BET_MULTIPLIERS = (1.0, 2.5, 6.25, 15.63, 39.08, 97.62, 244.05, 610.12)
+
+def get_bet_multiplier(phase):
+    """Bet multiplier for a phase, saturating at the last step"""
+    return BET_MULTIPLIERS[min(phase, len(BET_MULTIPLIERS)) - 1]
+
+# =============================================
+# SIGNAL PATTERNS
+# =============================================
+
+# All signal fields are matched by one alternation so a message is scanned
+# once; the named group that fired tells which field was found.
+SIGNAL_RE = re.compile(
+    r'(?P<current>Current\s+period ID:\s*(?P<current_id>\d+))'
+    r'|(?P<period>period ID:\s*(?P<period_id>\d+))'
+    r'|(?P<quantity>(?i:quantity):\s*x?(?P<quantity_value>\d+(?:\.\d+)?))'
+    r'|(?P<win>Result:Win|Win🎉)'
+    r'|(?P<lose>Result:Lose|Lose💔)'
+    r'|(?P<green>🟢)'
+    r'|(?P<red>🔴)'
+)
+
+# Splitting a bulk paste: before each block header, else at blank-line gaps
+BLOCK_START_RE = re.compile(r'(?=⏰Transaction type:)')
+BLOCK_GAP_RE = re.compile(r'\n\s*\n\s*[⏰ETHGPT]')
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def extract_signal_fields(message):
+    """Extract period ID, result, trade color and quantity from a message"""
+    # A real signal block is a few hundred chars; bound the scan cost
+    if not message or len(message) > MAX_SIGNAL_LENGTH:
+        return None
+    
+    # Cheap prefilter: skip the regex scan when required markers are absent
+    if 'period ID' not in message or ('🟢' not in message and '🔴' not in message):
+        return None
+    # Every result marker contains 'Result:', 🎉 or 💔
+    if 'Result:' not in message and '🎉' not in message and '💔' not in message:
+        return None
+    
+    # Scan the message once, keeping the first match of each field
+    fields = {}
+    for match in SIGNAL_RE.finditer(message):
+        fields.setdefault(match.lastgroup, match)
+    
+    # A Current period ID wins over any plain period ID, wherever it appears
+    if 'current' in fields:
+        period_id = fields['current'].group('current_id')
+    elif 'period' in fields:
+        period_id = fields['period'].group('period_id')
+    else:
+        return None
+    
+    if 'win' in fields:
+        result = 'Win'
+    elif 'lose' in fields:
+        result = 'Lose'
+    else:
+        return None
+    
+    if 'green' in fields:
+        trade_color = 'Green'
+    elif 'red' in fields:
+        trade_color = 'Red'
+    else:
+        return None
+    
+    quantity = None
+    if 'quantity' in fields:
+        quantity = float(fields['quantity'].group('quantity_value'))
+    
+    return {
+        'period_id': period_id,
+        'result': result,
+        'trade_color': trade_color,
+        'quantity': quantity
+    }
 
 # =============================================
 # R2 STORAGE FUNCTIONS
 # =============================================
 
+@st.cache_resource(show_spinner=False)
 def get_r2_client():
-    """Initialize R2 client if credentials are available"""
+    """Initialize R2 client if credentials are available (shared per process)"""
     if R2_ACCESS_KEY_ID and R2_SECRET_ACCESS_KEY and R2_ENDPOINT:
         try:
             return boto3.client(
@@ -47,39 +137,161 @@ def get_r2_client():
                 endpoint_url=R2_ENDPOINT,
                 aws_access_key_id=R2_ACCESS_KEY_ID,
                 aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-                config=Config(signature_version='s3v4')
+                config=Config(
+                    signature_version='s3v4',
+                    max_pool_connections=16,
+                    tcp_keepalive=True,
+                    retries={'max_attempts': 3, 'mode': 'standard'}
+                )
             )
         except Exception:
             return None
     return None
 
-def save_to_r2(data, key):
+def encode_json(data):
+    """Serialize data for R2 as UTF-8 bytes, using orjson when installed"""
+    if orjson:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    # Encode once here so put_object gets bytes on both paths; compact
+    # separators match orjson's output and skip the default padding
+    return json.dumps(data, default=str, separators=(',', ':')).encode('utf-8')
+
+def decode_json(raw):
+    """Parse a JSON payload read from R2"""
+    if orjson:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def save_to_r2(data, key, s3_client=None):
     """Save data to R2 storage"""
     try:
-        s3_client = get_r2_client()
+        s3_client = s3_client or get_r2_client()
         if s3_client:
             s3_client.put_object(
                 Bucket=R2_BUCKET,
                 Key=key,
-                Body=json.dumps(data, default=str),
+                Body=encode_json(data),
                 ContentType='application/json'
             )
             return True
     except Exception:
         return False
 
-def load_from_r2(key):
+def load_from_r2(key, s3_client=None):
     """Load data from R2 storage"""
     try:
-        s3_client = get_r2_client()
+        s3_client = s3_client or get_r2_client()
         if s3_client:
             response = s3_client.get_object(Bucket=R2_BUCKET, Key=key)
-            data = json.loads(response['Body'].read())
+            data = decode_json(response['Body'].read())
             return data
     except Exception:
         pass
     return None
 
+def save_lines_to_r2(records, key, s3_client=None):
+    """Save records to R2 storage as newline-delimited JSON"""
+    try:
+        s3_client = s3_client or get_r2_client()
+        if s3_client:
+            s3_client.put_object(
+                Bucket=R2_BUCKET,
+                Key=key,
+                Body=b''.join(encode_json(record) + b'\n' for record in records),
+                ContentType='application/x-ndjson'
+            )
+            return True
+    except Exception:
+        return False
+
+def load_lines_from_r2(key, s3_client=None):
+    """Load newline-delimited JSON records from R2 storage"""
+    try:
+        s3_client = s3_client or get_r2_client()
+        if s3_client:
+            response = s3_client.get_object(Bucket=R2_BUCKET, Key=key)
+            # A single-document .json object is also a one-line NDJSON object
+            return [decode_json(line) for line in response['Body'].read().splitlines() if line.strip()]
+    except Exception:
+        pass
+    return None
+
+def list_r2_keys(prefix, s3_client=None):
+    """List every key under a prefix in R2 storage"""
+    keys = []
+    try:
+        s3_client = s3_client or get_r2_client()
+        if s3_client:
+            paginator = s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=R2_BUCKET, Prefix=prefix):
+                keys.extend(obj['Key'] for obj in page.get('Contents', []))
+    except Exception:
+        pass
+    return keys
+
+def delete_from_r2(keys, s3_client=None):
+    """Delete keys from R2 storage"""
+    try:
+        s3_client = s3_client or get_r2_client()
+        if s3_client:
+            # delete_objects accepts at most 1000 keys per request
+            for start in range(0, len(keys), 1000):
+                batch = keys[start:start + 1000]
+                s3_client.delete_objects(
+                    Bucket=R2_BUCKET,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            return True
+    except Exception:
+        return False
+
+def delete_prefix_from_r2(prefix, s3_client=None):
+    """Delete every key under a prefix in R2 storage"""
+    return delete_from_r2(list_r2_keys(prefix, s3_client), s3_client)
+
+def delete_after_save(saved, keys, s3_client=None):
+    """Delete keys once every earlier queued save has succeeded"""
+    if all(future.result() for future in saved):
+        return delete_from_r2(keys, s3_client)
+    return False
+
+class R2Uploader:
+    """Uploads snapshots to R2 off the request path"""
+    
+    def __init__(self):
+        # One worker keeps uploads of the same key in submission order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='r2-upload')
+        self._pending = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, func, *args, key=None):
+        """Queue an R2 call; a newer call with the same key supersedes a queued one"""
+        # Resolve the client here; cached resources need the script thread
+        s3_client = get_r2_client()
+        if not s3_client:
+            return None
+        with self._lock:
+            previous = self._pending.get(key) if key is not None else None
+            future = self._executor.submit(func, *args, s3_client=s3_client)
+            if key is not None:
+                self._pending[key] = future
+        # Cancelling runs the done callback inline, and _forget takes the lock
+        if previous is not None:
+            previous.cancel()
+        if key is not None:
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+    
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+@st.cache_resource(show_spinner=False)
+def get_r2_uploader():
+    """Background uploader shared by all sessions in the process"""
+    return R2Uploader()
+
 # =============================================
 # INITIALIZATION
 # =============================================
@@ -87,188 +299,377 @@ def load_from_r2(key):
 # Initialize session state for data persistence
 if 'app_initialized' not in st.session_state:
     st.session_state.app_initialized = True
-    st.session_state.latest_signals = []
+    st.session_state.latest_signals = deque(maxlen=MAX_SIGNALS_HISTORY)
     st.session_state.bot_monitors = {}
     st.session_state.manual_signals_queue = deque()
     st.session_state.last_processed = None
 
+def predict_from_counts(green_count, red_count, last_color, prev_color):
+    """Predict the next color from window counts and the last two results"""
+    total = green_count + red_count
+    green_prob = green_count / total
+    
+    if last_color in ('Green', 'Red') and last_color == prev_color:
+        predicted_color = 'Red' if last_color == 'Green' else 'Green'
+        confidence = 'Medium'
+        probability = 0.65
+    elif green_prob > 0.6:
+        predicted_color = 'Green'
+        confidence = 'Medium'
+        probability = green_prob
+    elif green_prob < 0.4:
+        predicted_color = 'Red'
+        confidence = 'Medium'
+        probability = 1 - green_prob
+    else:
+        predicted_color = 'Green' if green_prob >= 0.5 else 'Red'
+        confidence = 'Low'
+        probability = 0.55
+    
+    # Display string is formatted once here rather than on every render
+    return {
+        'color': predicted_color,
+        'confidence': confidence,
+        'probability': probability,
+        'prob_str': f"{probability*100:.1f}%"
+    }
+
 class LightweightPredictor:
     def __init__(self):
         self.window_size = ANALYSIS_WINDOW
     
-    def predict(self, signals):
-        if len(signals) < 3:
-            return {'color': 'Analyzing...', 'confidence': 'Low', 'probability': 0.5}
-        
-        recent_colors = [s.get('result_color') for s in signals[-self.window_size:] if s.get('result_color') in ['Green', 'Red']]
-        
-        if not recent_colors:
-            return {'color': 'Green', 'confidence': 'Low', 'probability': 0.5}
+    def predict(self, window_colors, green_count, red_count, signal_count):
+        """Predict from the processor's running color window, in O(1)"""
+        if signal_count < 3:
+            return {'color': 'Analyzing...', 'confidence': 'Low', 'probability': 0.5, 'prob_str': '50.0%'}
         
-        green_count = recent_colors.count('Green')
-        red_count = recent_colors.count('Red')
-        total = green_count + red_count
+        if not green_count + red_count:
+            return {'color': 'Green', 'confidence': 'Low', 'probability': 0.5, 'prob_str': '50.0%'}
         
-        if total == 0:
-            return {'color': 'Green', 'confidence': 'Low', 'probability': 0.5}
-        
-        green_prob = green_count / total
-        
-        if len(recent_colors) >= 2 and recent_colors[-1] == recent_colors[-2]:
-            predicted_color = 'Red' if recent_colors[-1] == 'Green' else 'Green'
-            confidence = 'Medium'
-            probability = 0.65
-        elif green_prob > 0.6:
-            predicted_color = 'Green'
-            confidence = 'Medium'
-            probability = green_prob
-        elif green_prob < 0.4:
-            predicted_color = 'Red'
-            confidence = 'Medium'
-            probability = 1 - green_prob
-        else:
-            predicted_color = 'Green' if green_prob >= 0.5 else 'Red'
-            confidence = 'Low'
-            probability = 0.55
-        
-        return {'color': predicted_color, 'confidence': confidence, 'probability': probability}
+        # Only the last two Green/Red results matter for streaks; legacy
+        # records may carry other colors, which the window skips
+        decided = islice((color for color in reversed(window_colors) if color in ('Green', 'Red')), 2)
+        last_color, prev_color = (list(decided) + [None])[:2]
+        return predict_from_counts(green_count, red_count, last_color, prev_color)
 
 class SignalProcessor:
+    __slots__ = (
+        'bot_name', 'signals', 'last_period_id', 'predictor',
+        'current_phase', 'result_counter', 'recent_colors', '_green', '_red',
+        '_period_ids', '_signal_template', '_rand_bits', '_rand_left',
+        '_dirty', '_last_flush', '_unsaved', '_segments', '_next_segment', '_evicted',
+        '_clear_remote', '_migrate_legacy',
+        'lock'
+    )
+    
     def __init__(self, bot_name):
         self.bot_name = bot_name
-        self.signals = []
+        # Sessions share one processor; callers hold this while mutating it
+        self.lock = threading.Lock()
+        self.signals = deque(maxlen=MAX_SIGNALS_HISTORY)
         self.last_period_id = None
         self.predictor = LightweightPredictor()
         self.current_phase = 1
-        self.multipliers = BET_MULTIPLIERS
+        self.result_counter = Counter()
+        # Result-color column for the predictor's window, kept beside the records
+        self.recent_colors = deque(maxlen=self.predictor.window_size)
+        self._green = 0
+        self._red = 0
+        self._period_ids = set()
+        # Simulated colors draw one bit each from a 64-bit random word
+        self._rand_bits = 0
+        self._rand_left = 0
+        self._dirty = False
+        # Never flushed yet, so the first save is not held back on a fresh host
+        self._last_flush = float('-inf')
+        # Pending R2 changes: new signals by period ID, emptied segment keys, full wipe
+        self._unsaved = {}
+        self._evicted = []
+        # Saved NDJSON segments, oldest first, as [key, live signal count]
+        self._segments = deque()
+        self._next_segment = 0
+        self._clear_remote = False
+        # Set while signals from the old single-snapshot object await their own objects
+        self._migrate_legacy = False
+        # Fields every parsed signal starts from; copying beats rebuilding
+        self._signal_template = {
+            'timestamp': None,
+            'time': None,
+            'period_id': None,
+            'result': None,
+            'result_color': None,
+            'trade_color': None,
+            'quantity': 1.0,
+            'phase': 1,
+            'bot_name': bot_name,
+            'source': 'manual'
+        }
         self.load_data()
     
     def load_data(self):
         """Load data from R2 storage"""
         try:
-            data = load_from_r2(f"{self.bot_name}_data.json")
-            if data:
-                self.signals = data.get('signals', [])
-                self.current_phase = data.get('current_phase', 1)
-                self.last_period_id = data.get('last_period_id')
-                if self.signals:
-                    self.last_period_id = self.signals[-1]['period_id']
+            # Look the shared client up once and hand it to every call below
+            s3_client = get_r2_client()
+            if not s3_client:
+                return
+            meta = load_from_r2(f"{self.bot_name}_meta.json", s3_client)
+            prefix = f"signals/{self.bot_name}/"
+            keys = list_r2_keys(prefix, s3_client)
+            # Segments are numbered in write order, zero-padded so that text
+            # order is write order. Per-period .json objects from before
+            # segments existed are older than any segment; digit strings order
+            # numerically by (length, text).
+            segment_keys = sorted(key for key in keys if key.endswith('.ndjson'))
+            period_keys = sorted(
+                (key for key in keys if not key.endswith('.ndjson')), key=lambda key: (len(key), key)
+            )
+            if segment_keys:
+                self._next_segment = int(segment_keys[-1][len(prefix):].split('.', 1)[0]) + 1
+            keys = period_keys + segment_keys
+            if keys:
+                # Every live segment holds at least one signal, so older keys are stale
+                stale, keys = keys[:-MAX_SIGNALS_HISTORY], keys[-MAX_SIGNALS_HISTORY:]
+                # Per-object GETs are latency-bound; ~16 in flight saturates R2
+                with ThreadPoolExecutor(max_workers=16) as pool:
+                    loaded = list(pool.map(lambda key: load_lines_from_r2(key, s3_client), keys))
+                failed = sum(1 for records in loaded if records is None)
+                if failed:
+                    logger.warning("Could not read %d of %d signal segments for %s", failed, len(keys), self.bot_name)
+                # A compaction whose delete failed leaves older copies behind;
+                # keep each period's newest copy, in the order it was written
+                newest = {}
+                for index, records in enumerate(loaded):
+                    for record in records or ():
+                        newest.pop(record['period_id'], None)
+                        newest[record['period_id']] = (index, record)
+                kept = list(newest.values())[-MAX_SIGNALS_HISTORY:]
+                live = Counter(index for index, _ in kept)
+                for index, key in enumerate(keys):
+                    # Unreadable segments stay tracked with no live signals, so
+                    # eviction, compaction or Clear Data still deletes them
+                    if live[index] or loaded[index] is None:
+                        self._segments.append([key, live[index]])
+                    else:
+                        stale.append(key)
+                signals = [record for _, record in kept]
+                if stale:
+                    get_r2_uploader().submit(delete_from_r2, stale)
+            else:
+                # Older versions kept one snapshot object; migrate it on next flush
+                legacy = load_from_r2(f"{self.bot_name}_data.json", s3_client)
+                meta = meta or legacy
+                signals = legacy.get('signals', []) if legacy else []
+            
+            if signals:
+                # Signals saved before 'time' existed get it once here, not per render
+                for signal in signals:
+                    if not signal.get('time'):
+                        signal['time'] = (signal.get('timestamp') or '')[11:]
+                self.signals = deque(signals, maxlen=MAX_SIGNALS_HISTORY)
+                self.result_counter = Counter(s.get('result') for s in self.signals)
+                self._period_ids = {s['period_id'] for s in self.signals}
+                self.recent_colors.extend(s.get('result_color') for s in self.signals)
+                self._green = self.recent_colors.count('Green')
+                self._red = self.recent_colors.count('Red')
+                if not keys:
+                    self._unsaved = {s['period_id']: s for s in self.signals}
+                    self._migrate_legacy = True
+                    self._dirty = True
+            if meta:
+                self.current_phase = meta.get('current_phase', 1)
+                self.last_period_id = meta.get('last_period_id')
+            if self.signals:
+                self.last_period_id = self.signals[-1]['period_id']
         except Exception:
             pass
     
     def save_data(self):
-        """Save data to R2 storage"""
-        data = {
-            'signals': self.signals,
+        """Save data to R2 storage, writing only what changed"""
+        uploader = get_r2_uploader()
+        prefix = f"signals/{self.bot_name}/"
+        legacy_key = f"{self.bot_name}_data.json"
+        if self._clear_remote:
+            uploader.submit(delete_prefix_from_r2, prefix)
+            # Otherwise the next cold start would restore the cleared signals
+            uploader.submit(delete_from_r2, [legacy_key])
+            self._clear_remote = False
+        if self._evicted:
+            uploader.submit(delete_from_r2, self._evicted)
+            self._evicted = []
+        if self._unsaved:
+            # New signals since the last flush go out as one NDJSON segment
+            records = list(self._unsaved.values())
+            segment_key = f"{prefix}{self._next_segment:012d}.ndjson"
+            self._next_segment += 1
+            if len(self._segments) >= MAX_SIGNAL_SEGMENTS:
+                # Compact: rewrite the history as one segment, then drop the rest
+                records = list(self.signals)
+                old_keys = [segment[0] for segment in self._segments]
+                self._segments.clear()
+            else:
+                old_keys = []
+            saved = uploader.submit(save_lines_to_r2, records, segment_key)
+            self._segments.append([segment_key, len(records)])
+            if saved is not None:
+                # Older segments and the old snapshot go only once this write
+                # has landed; duplicates left by a failed delete are dropped on load
+                if old_keys:
+                    uploader.submit(delete_after_save, [saved], old_keys)
+                if self._migrate_legacy:
+                    uploader.submit(delete_after_save, [saved], [legacy_key])
+                    self._migrate_legacy = False
+            self._unsaved = {}
+        
+        meta_key = f"{self.bot_name}_meta.json"
+        meta = {
             'current_phase': self.current_phase,
             'last_period_id': self.last_period_id,
             'last_updated': datetime.now().isoformat(),
             'bot_name': self.bot_name
         }
-        save_to_r2(data, f"{self.bot_name}_data.json")
+        uploader.submit(save_to_r2, meta, meta_key, key=meta_key)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+    
+    def maybe_flush(self, force=False):
+        """Save unsaved signals, at most once per REFRESH_INTERVAL unless forced"""
+        if self._dirty and (force or time.monotonic() - self._last_flush >= REFRESH_INTERVAL):
+            self.save_data()
+    
+    def clear_data(self):
+        """Drop all signals and their running counts"""
+        self.signals.clear()
+        self.result_counter.clear()
+        self.recent_colors.clear()
+        self._green = 0
+        self._red = 0
+        self._period_ids.clear()
+        self._unsaved.clear()
+        self._segments.clear()
+        self._evicted.clear()
+        self._migrate_legacy = False
+        self._clear_remote = True
     
-    def parse_signal(self, message):
+    def parse_signal(self, message, timestamp=None):
         try:
-            if not message:
+            # Pure extraction is cached; phase and simulated color are not
+            fields = extract_signal_fields(message)
+            if not fields:
                 return None
             
-            signal_data = {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'period_id': None,
-                'result': None,
-                'result_color': None,
-                'trade_color': None,
-                'quantity': 1.0,
-                'phase': self.current_phase,
-                'bot_name': self.bot_name,
-                'source': 'manual'
-            }
+            # Batch callers format the clock once and pass it in
+            if timestamp is None:
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            signal_data = self._signal_template.copy()
+            signal_data['timestamp'] = timestamp
+            signal_data['time'] = timestamp[11:]
+            signal_data['phase'] = self.current_phase
+            signal_data['period_id'] = fields['period_id']
+            signal_data['result'] = fields['result']
+            signal_data['trade_color'] = fields['trade_color']
+            signal_data['result_color'] = self._rand_color()
             
-            # Extract period ID
-            period_match = re.search(r'Current period ID:\s*(\d+)', message)
-            if not period_match:
-                period_match = re.search(r'📌Current period ID:\s*(\d+)', message)
-            if not period_match:
-                period_match = re.search(r'period ID:\s*(\d+)', message)
-            if not period_match:
-                period_match = re.search(r'📌period ID:\s*(\d+)', message)
-            
-            if period_match:
-                signal_data['period_id'] = period_match.group(1)
-            else:
-                return None
-            
-            # Extract result
-            if 'Result:Win' in message or 'Win🎉' in message or '🔔Result:Win🎉' in message:
-                signal_data['result'] = 'Win'
-                signal_data['result_color'] = random.choice(['Green', 'Red'])
+            if fields['result'] == 'Win':
                 self.current_phase = 1
-            elif 'Result:Lose' in message or 'Lose💔' in message or '🔔Result:Lose💔' in message:
-                signal_data['result'] = 'Lose'
-                signal_data['result_color'] = random.choice(['Green', 'Red'])
-                if self.current_phase < len(self.multipliers):
-                    self.current_phase += 1
-            else:
-                return None
+            elif self.current_phase < len(BET_MULTIPLIERS):
+                self.current_phase += 1
             
-            # Extract trade color
-            if '🟢✔️' in message or 'Trade: 🟢' in message or '📲Trade: 🟢✔️' in message:
-                signal_data['trade_color'] = 'Green'
-            elif '🔴✔️' in message or 'Trade: 🔴' in message or '📲Trade: 🔴✔️' in message:
-                signal_data['trade_color'] = 'Red'
+            if fields['quantity'] is not None:
+                signal_data['quantity'] = fields['quantity']
             else:
-                return None
-            
-            # Extract quantity
-            qty_match = re.search(r'quantity:\s*x?([\d.]+)', message, re.IGNORECASE)
-            if not qty_match:
-                qty_match = re.search(r'Recommended quantity:\s*x?([\d.]+)', message, re.IGNORECASE)
-            
-            if qty_match:
-                try:
-                    signal_data['quantity'] = float(qty_match.group(1))
-                except:
-                    signal_data['quantity'] = self.multipliers[self.current_phase - 1]
-            else:
-                signal_data['quantity'] = self.multipliers[self.current_phase - 1]
+                signal_data['quantity'] = get_bet_multiplier(self.current_phase)
             
             # Add prediction
-            signal_data['prediction'] = self.predictor.predict(self.signals)
+            signal_data['prediction'] = self.predictor.predict(
+                self.recent_colors, self._green, self._red, len(self.signals)
+            )
             
             return signal_data
             
         except Exception:
             return None
     
+    def _rand_color(self):
+        """Random Green/Red, consuming one bit of a buffered random word"""
+        if not self._rand_left:
+            self._rand_bits = random.getrandbits(64)
+            self._rand_left = 64
+        bit = self._rand_bits & 1
+        self._rand_bits >>= 1
+        self._rand_left -= 1
+        return 'Green' if bit else 'Red'
+    
+    def parse_many(self, messages):
+        """Parse messages lazily, yielding only valid signals"""
+        # Yielding before the next parse lets callers add each signal first,
+        # so predictions still see every earlier signal in the batch
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for message in messages:
+            signal_data = self.parse_signal(message, timestamp)
+            if signal_data:
+                yield signal_data
+    
+    def _push_color(self, color):
+        """Append to the predictor window, keeping Green/Red counts rolling"""
+        if len(self.recent_colors) == self.recent_colors.maxlen:
+            dropped = self.recent_colors[0]
+            if dropped == 'Green':
+                self._green -= 1
+            elif dropped == 'Red':
+                self._red -= 1
+        self.recent_colors.append(color)
+        if color == 'Green':
+            self._green += 1
+        elif color == 'Red':
+            self._red += 1
+    
     def add_signal(self, signal_data):
         if signal_data:
             # Check if this period ID already exists
-            existing_ids = [s['period_id'] for s in self.signals]
-            if signal_data['period_id'] not in existing_ids:
+            if signal_data['period_id'] not in self._period_ids:
+                # The deque drops its oldest signal when full; uncount it first
+                if len(self.signals) == self.signals.maxlen:
+                    evicted = self.signals[0]
+                    self.result_counter[evicted.get('result')] -= 1
+                    self._period_ids.discard(evicted['period_id'])
+                    # Saved signals live in the oldest segment; delete it once empty
+                    if self._unsaved.pop(evicted['period_id'], None) is None:
+                        # Segments left unread on load count no live signals
+                        while self._segments and not self._segments[0][1]:
+                            self._evicted.append(self._segments.popleft()[0])
+                        if self._segments:
+                            segment = self._segments[0]
+                            segment[1] -= 1
+                            if not segment[1]:
+                                self._evicted.append(self._segments.popleft()[0])
                 self.signals.append(signal_data)
+                self.result_counter[signal_data['result']] += 1
+                self._push_color(signal_data['result_color'])
+                self._period_ids.add(signal_data['period_id'])
+                self._unsaved[signal_data['period_id']] = signal_data
                 self.last_period_id = signal_data['period_id']
                 
-                # Keep only max signals
-                if len(self.signals) > MAX_SIGNALS_HISTORY:
-                    self.signals = self.signals[-MAX_SIGNALS_HISTORY:]
-                
                 # Update global signals
                 st.session_state.latest_signals.append(signal_data)
-                if len(st.session_state.latest_signals) > MAX_SIGNALS_HISTORY:
-                    st.session_state.latest_signals = st.session_state.latest_signals[-MAX_SIGNALS_HISTORY:]
                 
-                # Save to R2 storage
-                self.save_data()
+                # Saved to R2 in batches by maybe_flush()
+                self._dirty = True
                 
                 return True
             else:
                 return False
         return False
 
+@st.cache_resource(show_spinner=False)
+def get_processor(bot_name):
+    """Processor shared by all sessions, so R2 is loaded once per process"""
+    return SignalProcessor(bot_name)
+
 # Initialize bot in session state
 bot_key = f"Bot_1_{TELEGRAM_BOT_NAME}"
 if bot_key not in st.session_state.bot_monitors:
-    st.session_state.bot_monitors[bot_key] = SignalProcessor(TELEGRAM_BOT_NAME)
+    st.session_state.bot_monitors[bot_key] = get_processor(TELEGRAM_BOT_NAME)
 
 # Get the processor
 processor = st.session_state.bot_monitors[bot_key]
@@ -277,15 +678,26 @@ processor = st.session_state.bot_monitors[bot_key]
 # AUTO PROCESSING FUNCTIONS
 # =============================================
 
+def warn_oversized(signal_texts):
+    """Warn about blocks the parser skips for exceeding MAX_SIGNAL_LENGTH"""
+    skipped = sum(1 for signal_text in signal_texts if len(signal_text) > MAX_SIGNAL_LENGTH)
+    if skipped:
+        st.warning(f"⚠️ Skipped {skipped} signals longer than {MAX_SIGNAL_LENGTH} characters")
+
 def process_queued_signals():
     """Process any signals in the manual queue"""
     processed_count = 0
-    while st.session_state.manual_signals_queue:
-        signal_text = st.session_state.manual_signals_queue.popleft()
-        signal = processor.parse_signal(signal_text)
-        if signal:
-            if processor.add_signal(signal):
-                processed_count += 1
+    warn_oversized(st.session_state.manual_signals_queue)
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with processor.lock:
+        while st.session_state.manual_signals_queue:
+            signal_text = st.session_state.manual_signals_queue.popleft()
+            signal = processor.parse_signal(signal_text, timestamp)
+            if signal:
+                if processor.add_signal(signal):
+                    processed_count += 1
+        # One save for the whole queue, right away rather than on the next tick
+        processor.maybe_flush(force=True)
     return processed_count
 
 def add_to_manual_queue(signal_text):
@@ -297,12 +709,12 @@ def extract_individual_signals(bulk_text):
     signals = []
     
     # Method 1: Split by transaction type
-    signal_blocks = re.split(r'(?=⏰Transaction type:)', bulk_text)
+    signal_blocks = BLOCK_START_RE.split(bulk_text)
     signal_blocks = [block.strip() for block in signal_blocks if block.strip()]
     
     # Method 2: If first method doesn't work well, try alternative
     if len(signal_blocks) <= 1:
-        signal_blocks = re.split(r'\n\s*\n\s*[⏰ETHGPT]', bulk_text)
+        signal_blocks = BLOCK_GAP_RE.split(bulk_text)
         signal_blocks = [block.strip() for block in signal_blocks if block.strip()]
     
     for block in signal_blocks:
@@ -323,7 +735,7 @@ st.set_page_config(
 )
 
 # CSS Styles
-st.markdown("""
+APP_CSS = """
 <style>
     .main-header {
         font-size: 2rem;
@@ -354,6 +766,16 @@ st.markdown("""
         margin: 4px 0;
         border-left: 4px solid #dc3545;
     }
+    .signal-row {
+        display: flex;
+        gap: 12px;
+    }
+    .signal-main {
+        flex: 2;
+    }
+    .signal-details {
+        flex: 3;
+    }
     .mobile-workflow {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
         padding: 12px;
@@ -423,7 +845,25 @@ st.markdown("""
         font-size: 0.7em;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Static page blocks; the env-derived values never change within a process
+PAGE_HEADER_HTML = f'{APP_CSS}<div class="main-header">{APP_NAME}</div>'
+
+WORKFLOW_HTML = """
+    <div class="mobile-workflow">
+    <h3>🚀 STABLE BULK PROCESSING</h3>
+    <ol>
+    <li><strong>COPY</strong> multiple signals from Telegram</li>
+    <li><strong>PASTE</strong> exactly as they appear</li>
+    <li><strong>PROCESS</strong> all at once automatically</li>
+    </ol>
+    <p><strong>⚡ Optimized for Render Free Tier</strong></p>
+    <p><strong>☁️ Data saved to Cloudflare R2</strong></p>
+    </div>
+    """
+
+REFRESH_BANNER_HTML = f'<div class="refresh-banner">🔄 Auto-refresh: {REFRESH_INTERVAL} seconds</div>'
 
 def display_environment_info():
     """Display environment configuration"""
@@ -450,117 +890,135 @@ def display_environment_info():
             st.rerun()
         
         if st.button("🗑️ Clear Data"):
-            processor.signals.clear()
+            with processor.lock:
+                processor.clear_data()
+                processor.save_data()
             st.session_state.latest_signals.clear()
             st.session_state.manual_signals_queue.clear()
-            processor.save_data()
             st.success("✅ All data cleared!")
             st.rerun()
 
+@st.fragment(run_every=REFRESH_INTERVAL)
 def display_dashboard():
-    """Display the main dashboard"""
-    st.header("📊 LIVE DASHBOARD")
+    """Display the main dashboard; reruns on its own every REFRESH_INTERVAL"""
+    # Other sessions mutate the shared processor, so read everything shown
+    # here in one locked snapshot (all O(1) apart from the short tail copy)
+    with processor.lock:
+        # Persist new signals; runs on every refresh, so nothing waits long
+        processor.maybe_flush()
+        total = len(processor.signals)
+        wins = processor.result_counter['Win']
+        losses = processor.result_counter['Lose']
+        current_phase = processor.current_phase
+        display_signals = list(islice(reversed(processor.signals), MAX_SIGNALS_DISPLAY))
     
-    # Get current signals from session state
-    signals = processor.signals
+    st.header("📊 LIVE DASHBOARD")
     
     st.markdown(f'<div class="bot-card"><h3>🤖 {TELEGRAM_BOT_NAME} <span class="auto-badge">STABLE</span></h3></div>', unsafe_allow_html=True)
     
-    if signals:
-        # Statistics Row
+    if total:
+        # Statistics Row; totals come from the running counter
+        win_rate = wins / total * 100
+        
         st.subheader("📈 Statistics")
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.markdown(f'<div class="stats-card"><h4>📊 Total</h4><h2>{len(signals)}</h2></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="stats-card"><h4>📊 Total</h4><h2>{total}</h2></div>', unsafe_allow_html=True)
         with col2:
-            wins = len([s for s in signals if s.get('result') == 'Win'])
             st.markdown(f'<div class="stats-card"><h4>✅ Wins</h4><h2>{wins}</h2></div>', unsafe_allow_html=True)
         with col3:
-            losses = len([s for s in signals if s.get('result') == 'Lose'])
             st.markdown(f'<div class="stats-card"><h4>❌ Losses</h4><h2>{losses}</h2></div>', unsafe_allow_html=True)
         with col4:
-            win_rate = (wins / len(signals) * 100) if signals else 0
             st.markdown(f'<div class="stats-card"><h4>🎯 Win Rate</h4><h2>{win_rate:.1f}%</h2></div>', unsafe_allow_html=True)
         
         # Current Status Row
         st.subheader("🔄 Current Status")
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Current Phase", processor.current_phase)
+            st.metric("Current Phase", current_phase)
         with col2:
-            current_multiplier = processor.multipliers[processor.current_phase - 1] if processor.current_phase <= len(processor.multipliers) else 1.0
+            current_multiplier = get_bet_multiplier(current_phase)
             st.metric("Next Bet", f"x{current_multiplier}")
         
         # Recent Signals
         st.subheader(f"📋 Recent Signals")
-        display_signals = signals[-MAX_SIGNALS_DISPLAY:]
-        for signal in reversed(display_signals):
-            display_signal_card(signal)
+        cards = ''.join(signal_card_html(signal) for signal in display_signals)
+        st.markdown(cards, unsafe_allow_html=True)
             
     else:
         st.info("📡 No signals yet. Paste signals below!")
 
-def display_signal_card(signal):
-    """Display individual signal card"""
-    result = signal.get('result', 'Unknown')
-    css_class = "signal-card-win" if result == 'Win' else "signal-card-loss"
+COLOR_EMOJI = {'Green': '🟢', 'Red': '🔴'}
+
+SIGNAL_CARD_HTML = (
+    '<div class="{css_class}"><div class="signal-row">'
+    '<div class="signal-main"><b>Period:</b> {period_id}<br>'
+    '<b>Time:</b> <code>{signal_time}</code><br>'
+    '<b>Result:</b> {result_label}</div>'
+    '<div class="signal-details">{details}</div>'
+    '</div></div>'
+)
+
+def signal_card_html(signal):
+    """Build the HTML for an individual signal card"""
+    prediction = None
+    if signal.get('prediction'):
+        pred = signal['prediction']
+        # Predictions saved before 'prob_str' existed are formatted here
+        prob_str = pred.get('prob_str') or f"{pred.get('probability', 0.5)*100:.1f}%"
+        prediction = (pred.get('color', 'Analyzing'), pred.get('confidence', 'Low'), prob_str)
     
-    st.markdown(f'<div class="{css_class}">', unsafe_allow_html=True)
+    # Stored signals never change, so their fields fingerprint the card
+    return render_signal_card((
+        signal['period_id'],
+        signal.get('result', 'Unknown'),
+        signal['time'],
+        signal.get('trade_color'),
+        signal.get('result_color'),
+        signal.get('phase', 1),
+        signal.get('quantity', 1.0),
+        prediction
+    ))
+
+@st.cache_data(max_entries=MAX_SIGNALS_HISTORY, show_spinner=False)
+def render_signal_card(fields):
+    """Render a signal card from its field tuple; cached per fingerprint"""
+    period_id, result, signal_time, trade_color, result_color, phase, quantity, prediction = fields
+    details = []
+    if trade_color:
+        details.append(f"<b>Trade:</b> {COLOR_EMOJI.get(trade_color, '🔴')} {trade_color}")
     
-    col1, col2 = st.columns([2, 3])
+    if result_color:
+        details.append(f"<b>Result:</b> {COLOR_EMOJI.get(result_color, '🔴')} {result_color}")
     
-    with col1:
-        st.write(f"**Period:** {signal['period_id']}")
-        st.write(f"**Time:** `{signal['timestamp'].split(' ')[1]}`")
-        st.write(f"**Result:** {'✅ WIN' if result == 'Win' else '❌ LOSE'}")
-        
-    with col2:
-        if signal.get('trade_color'):
-            trade_emoji = "🟢" if signal['trade_color'] == 'Green' else "🔴"
-            st.write(f"**Trade:** {trade_emoji} {signal['trade_color']}")
-        
-        if signal.get('result_color'):
-            color_emoji = "🟢" if signal['result_color'] == 'Green' else "🔴"
-            st.write(f"**Result:** {color_emoji} {signal['result_color']}")
-        
-        st.write(f"**Phase:** {signal.get('phase', 1)}")
-        st.write(f"**Bet:** x{signal.get('quantity', 1.0)}")
+    details.append(f"<b>Phase:</b> {phase}")
+    details.append(f"<b>Bet:</b> x{quantity}")
+    
+    # Prediction
+    if prediction:
+        pred_color, confidence, prob_str = prediction
+        pred_emoji = COLOR_EMOJI.get(pred_color, '⚫')
+        confidence_class = f"prediction-{confidence.lower()}"
         
-        # Prediction
-        if signal.get('prediction'):
-            pred = signal['prediction']
-            pred_color = pred.get('color', 'Analyzing')
-            confidence = pred.get('confidence', 'Low')
-            probability = pred.get('probability', 0.5)
-            
-            pred_emoji = "🟢" if pred_color == 'Green' else "🔴" if pred_color == 'Red' else "⚫"
-            confidence_class = f"prediction-{confidence.lower()}"
-            
-            st.write(f"**Next:** {pred_emoji} {pred_color}")
-            st.markdown(f'<div class="{confidence_class}">Confidence: {confidence} ({probability*100:.1f}%)</div>', unsafe_allow_html=True)
+        details.append(f"<b>Next:</b> {pred_emoji} {pred_color}")
+        details.append(f'<div class="{confidence_class}">Confidence: {confidence} ({prob_str})</div>')
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    return SIGNAL_CARD_HTML.format(
+        css_class="signal-card-win" if result == 'Win' else "signal-card-loss",
+        period_id=period_id,
+        signal_time=signal_time,
+        result_label='✅ WIN' if result == 'Win' else '❌ LOSE',
+        details='<br>'.join(details)
+    )
 
 def main():
-    # Header
-    st.markdown(f'<div class="main-header">{APP_NAME}</div>', unsafe_allow_html=True)
-    
-    # Display environment info in sidebar
-    display_environment_info()
+    # Styles must be re-emitted every full run or Streamlit drops them; they
+    # ride along with the header so the page costs one element, and the
+    # dashboard fragment's timed reruns never resend them
+    st.markdown(PAGE_HEADER_HTML, unsafe_allow_html=True)
     
     # Workflow info
-    st.markdown(f"""
-    <div class="mobile-workflow">
-    <h3>🚀 STABLE BULK PROCESSING</h3>
-    <ol>
-    <li><strong>COPY</strong> multiple signals from Telegram</li>
-    <li><strong>PASTE</strong> exactly as they appear</li>
-    <li><strong>PROCESS</strong> all at once automatically</li>
-    </ol>
-    <p><strong>⚡ Optimized for Render Free Tier</strong></p>
-    <p><strong>☁️ Data saved to Cloudflare R2</strong></p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(WORKFLOW_HTML, unsafe_allow_html=True)
     
     # Process any queued signals first
     queue_size = len(st.session_state.manual_signals_queue)
@@ -569,10 +1027,11 @@ def main():
             processed = process_queued_signals()
             if processed > 0:
                 st.success(f"✅ Processed {processed} signals!")
-                time.sleep(2)
-                st.rerun()
     
-    st.markdown(f'<div class="refresh-banner">🔄 Auto-refresh: {REFRESH_INTERVAL} seconds</div>', unsafe_allow_html=True)
+    # Sidebar renders after the queue is drained so its count is current
+    display_environment_info()
+    
+    st.markdown(REFRESH_BANNER_HTML, unsafe_allow_html=True)
     
     # Signal Input Section
     st.header("📥 BULK SIGNAL INPUT")
@@ -607,18 +1066,17 @@ Recommended quantity: x1
                     processed_count = 0
                     
                     st.info(f"📋 Found {len(signals)} potential signals")
+                    warn_oversized(signals)
                     
-                    for signal_text in signals:
-                        signal = processor.parse_signal(signal_text)
-                        if signal:
+                    with processor.lock:
+                        for signal in processor.parse_many(signals):
                             if processor.add_signal(signal):
                                 processed_count += 1
+                        processor.maybe_flush(force=True)
                     
                     if processed_count > 0:
                         st.balloons()
                         st.success(f"🎉 Successfully processed {processed_count} signals!")
-                        time.sleep(3)
-                        st.rerun()
                     else:
                         st.error("❌ No valid signals found. Check the format.")
             else:
@@ -636,9 +1094,8 @@ Recommended quantity: x1
     # Dashboard
     display_dashboard()
     
-    # Manual refresh button instead of auto-refresh
-    if st.button("🔄 MANUAL REFRESH", use_container_width=True):
-        st.rerun()
+    # Manual refresh button for an immediate update; the click itself reruns
+    st.button("🔄 MANUAL REFRESH", use_container_width=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+import io
+import json
+import os
+
+import boto3
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+BOT_KEY = 'Bot_1_ETHGPT60s_bot'
+
+
+class FakeS3:
+    """In-memory bucket covering the S3 calls the app makes"""
+
+    def __init__(self):
+        self.objects = {}
+        # Keys whose every request fails, as if R2 were unreachable for them
+        self.broken = set()
+
+    def check(self, *keys):
+        if self.broken.intersection(keys):
+            raise ConnectionError('R2 unavailable')
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.check(Key)
+        self.objects[Key] = Body.encode('utf-8') if isinstance(Body, str) else Body
+
+    def get_object(self, Bucket, Key):
+        self.check(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def delete_objects(self, Bucket, Delete):
+        self.check(*(obj['Key'] for obj in Delete['Objects']))
+        for obj in Delete['Objects']:
+            self.objects.pop(obj['Key'], None)
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        yield {'Contents': [{'Key': key} for key in self.keys(Prefix)]}
+
+    def keys(self, prefix=''):
+        return sorted(key for key in self.objects if key.startswith(prefix))
+
+    def put_json(self, key, data):
+        self.objects[key] = json.dumps(data).encode('utf-8')
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(monkeypatch):
+    """Keep deployment settings from the environment out of the tests"""
+    for name in ('R2_ACCESS_KEY_ID', 'R2_SECRET_ACCESS_KEY', 'R2_ENDPOINT', 'R2_ACCOUNT_ID',
+                 'TELEGRAM_BOT_NAME'):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Caches live for the process, so each test starts without them"""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """R2 credentials pointing every boto3 client at one in-memory bucket"""
+    bucket = FakeS3()
+    monkeypatch.setenv('R2_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('R2_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setenv('R2_ENDPOINT', 'https://r2.invalid')
+    monkeypatch.setattr(boto3, 'client', lambda *args, **kwargs: bucket)
+    return bucket
+
+
+@pytest.fixture
+def new_session():
+    """Start a browser session: run app.py once and return its AppTest"""
+    def start():
+        at = AppTest.from_file(APP_PATH, default_timeout=30).run()
+        assert not at.exception
+        return at
+    return start
+
+
+@pytest.fixture
+def processor_of():
+    """The bot's SignalProcessor as seen by a session"""
+    def lookup(at):
+        return at.session_state['bot_monitors'][BOT_KEY]
+    return lookup
+
+
+@pytest.fixture
+def processor(new_session, processor_of):
+    return processor_of(new_session())
+
+
+@pytest.fixture
+def drain(processor_of):
+    """Wait for the background R2 uploads a session has queued so far"""
+    def wait(at):
+        uploader = type(processor_of(at)).save_data.__globals__['get_r2_uploader']()
+        uploader._executor.submit(lambda: None).result(timeout=5)
+    return wait
+
+
+@pytest.fixture
+def restart(new_session, drain):
+    """Let a session's uploads finish, then start over as a fresh process"""
+    def start(at=None):
+        if at is not None:
+            drain(at)
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        return new_session()
+    return start
+
+
+@pytest.fixture
+def paste(processor_of):
+    """Paste text into the bulk input, press PROCESS ALL SIGNALS, return the processor"""
+    def submit(at, text):
+        at.text_area(key='signal_input').input(text)
+        at.button(key='process_btn').click().run()
+        assert not at.exception
+        return processor_of(at)
+    return submit
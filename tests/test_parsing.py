@@ -0,0 +1,143 @@
+import pytest
+
+
+SIGNAL = (
+    "⏰Transaction type: ETH 1 minutes⏰\n"
+    "📌Current period ID: 202510211143\n"
+    "🔔Result:Win🎉\n"
+    "📌period ID: 202510211144\n"
+    "📲Trade: 🔴✔️\n"
+    "Recommended quantity: x2.5\n"
+)
+
+
+def test_parses_every_field_from_one_block(processor):
+    signal = processor.parse_signal(SIGNAL)
+    assert signal['period_id'] == '202510211143'
+    assert signal['result'] == 'Win'
+    assert signal['trade_color'] == 'Red'
+    assert signal['quantity'] == 2.5
+
+
+@pytest.mark.parametrize('text', [
+    "📌period ID: 202510211144\n📌Current period ID: 202510211143\n🔔Result:Win🎉\n📲Trade: 🔴✔️",
+    "📌Current period ID: 202510211143\n📌period ID: 202510211144\n🔔Result:Win🎉\n📲Trade: 🔴✔️",
+])
+def test_current_period_id_wins_over_a_plain_period_id(processor, text):
+    assert processor.parse_signal(text)['period_id'] == '202510211143'
+
+
+def test_plain_period_id_is_used_without_a_current_one(processor):
+    signal = processor.parse_signal("📌period ID: 202510211144\n🔔Result:Win🎉\n📲Trade: 🔴✔️")
+    assert signal['period_id'] == '202510211144'
+
+
+def test_lose_result_is_recognized(processor):
+    signal = processor.parse_signal("📌Current period ID: 7\n🔔Result:Lose💔\n📲Trade: 🟢✔️")
+    assert signal['result'] == 'Lose'
+    assert signal['trade_color'] == 'Green'
+
+
+def test_block_missing_a_required_field_is_rejected(processor):
+    assert processor.parse_signal("📌Current period ID: 7\n📲Trade: 🟢✔️") is None
+    assert processor.parse_signal("🔔Result:Win🎉\n📲Trade: 🟢✔️") is None
+    assert processor.parse_signal("📌Current period ID: 7\n🔔Result:Win🎉") is None
+
+
+def test_losses_advance_the_phase_and_a_win_resets_it(processor):
+    processor.parse_signal("📌Current period ID: 1\n🔔Result:Lose💔\n📲Trade: 🟢✔️")
+    processor.parse_signal("📌Current period ID: 2\n🔔Result:Lose💔\n📲Trade: 🟢✔️")
+    assert processor.current_phase == 3
+    processor.parse_signal("📌Current period ID: 3\n🔔Result:Win🎉\n📲Trade: 🟢✔️")
+    assert processor.current_phase == 1
+
+
+def test_trade_color_is_read_from_the_emoji_in_any_marker_form(processor):
+    for marker, color in (('🟢✔️', 'Green'), ('Trade: 🔴', 'Red'), ('📲Trade: 🟢✔️', 'Green')):
+        signal = processor.parse_signal(f"📌Current period ID: 7\n🔔Result:Win🎉\n{marker}")
+        assert signal['trade_color'] == color
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Recommended quantity: x3', 3.0),
+    ('Quantity: x2.5', 2.5),
+    ('QUANTITY: x3', 3.0),
+    ('quantity: 6.25', 6.25),
+])
+def test_quantity_label_is_case_insensitive(processor, line, expected):
+    signal = processor.parse_signal(f"📌Current period ID: 5\n🔔Result:Win🎉\n📲Trade: 🟢✔️\n{line}")
+    assert signal['quantity'] == expected
+
+
+def test_malformed_quantity_falls_back_to_the_phase_multiplier(processor):
+    signal = processor.parse_signal("📌Current period ID: 5\n🔔Result:Win🎉\n📲Trade: 🟢✔️\nquantity: x.")
+    assert signal['quantity'] == 1.0
+
+
+def test_display_time_is_stored_with_the_signal(processor):
+    signal = processor.parse_signal(SIGNAL)
+    assert signal['time'] == signal['timestamp'].split(' ')[1]
+
+
+def test_parse_many_yields_only_valid_signals_in_order(processor):
+    messages = [
+        "📌Current period ID: 1\n🔔Result:Win🎉\n📲Trade: 🟢✔️",
+        "not a signal",
+        "📌Current period ID: 2\n🔔Result:Lose💔\n📲Trade: 🔴✔️",
+    ]
+    signals = list(processor.parse_many(messages))
+    assert [signal['period_id'] for signal in signals] == ['1', '2']
+    # Each record is its own copy of the template
+    signals[0]['source'] = 'edited'
+    assert signals[1]['source'] == 'manual'
+
+
+def test_blocks_up_to_the_length_limit_are_parsed(monkeypatch, new_session, processor_of):
+    monkeypatch.setenv('MAX_SIGNAL_LENGTH', '200')
+    processor = processor_of(new_session())
+    base = "📌Current period ID: 5\n🔔Result:Win🎉\n📲Trade: 🟢✔️\n"
+    at_limit = base + '.' * (200 - len(base))
+    assert len(at_limit) == 200
+    assert processor.parse_signal(at_limit)['period_id'] == '5'
+    assert processor.parse_signal(at_limit + '.') is None
+
+
+@pytest.mark.parametrize('message', [
+    'hello world',
+    SIGNAL.replace('🔴', ''),
+    SIGNAL.replace('period ID', 'round'),
+    SIGNAL.replace('🔔Result:Win🎉', '🔔Pending'),
+])
+def test_messages_without_required_markers_are_skipped(processor, message):
+    assert processor.parse_signal(message) is None
+    assert processor.current_phase == 1
+
+
+def test_reparsing_a_cached_message_still_advances_the_phase(processor):
+    message = SIGNAL.replace('Result:Win🎉', 'Result:Lose💔')
+    phases = [processor.parse_signal(message)['phase'] for _ in range(3)]
+    assert phases == [1, 2, 3]
+    assert processor.current_phase == 4
+
+
+def test_cached_fields_are_not_shared_between_signals(processor):
+    first = processor.parse_signal(SIGNAL)
+    first['trade_color'] = 'Green'
+    assert processor.parse_signal(SIGNAL)['trade_color'] == 'Red'
+
+
+def test_parse_many_stamps_the_whole_batch_once(processor):
+    messages = [SIGNAL.replace('202510211143', str(period_id)) for period_id in range(5)]
+    signals = list(processor.parse_many(messages))
+    assert len({signal['timestamp'] for signal in signals}) == 1
+    assert signals[0]['time'] == signals[0]['timestamp'][11:]
+
+
+def test_a_given_timestamp_is_used_as_is(processor):
+    signal = processor.parse_signal(SIGNAL, '2025-03-04 05:06:07')
+    assert (signal['timestamp'], signal['time']) == ('2025-03-04 05:06:07', '05:06:07')
+
+
+@pytest.mark.parametrize('marker, result', [('Result:Win', 'Win'), ('Win🎉', 'Win'), ('Lose💔', 'Lose')])
+def test_each_result_marker_passes_the_prefilter(processor, marker, result):
+    assert processor.parse_signal(SIGNAL.replace('Result:Win🎉', marker))['result'] == result
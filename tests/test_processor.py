@@ -0,0 +1,374 @@
+import random
+import threading
+
+import pytest
+import streamlit as st
+
+
+def block(period_id, result='Win', trade='🟢'):
+    marker = '🎉' if result == 'Win' else '💔'
+    return (
+        "⏰Transaction type: ETH 1 minutes⏰\n"
+        f"📌Current period ID: {period_id}\n"
+        f"🔔Result:{result}{marker}\n"
+        f"📲Trade: {trade}✔️\n"
+        "Recommended quantity: x1\n"
+    )
+
+
+def paste_text(period_ids, result='Win'):
+    return '\n'.join(block(period_id, result) for period_id in period_ids)
+
+
+def period_ids(processor):
+    return [signal['period_id'] for signal in processor.signals]
+
+
+def test_history_keeps_only_the_newest_signals(monkeypatch, new_session, paste):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '5')
+    processor = paste(new_session(), paste_text(range(1, 9)))
+    assert period_ids(processor) == ['4', '5', '6', '7', '8']
+
+
+def test_latest_signals_are_bounded_per_session(monkeypatch, new_session, paste):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '5')
+    at = new_session()
+    paste(at, paste_text(range(1, 9)))
+    assert [signal['period_id'] for signal in at.session_state['latest_signals']] == ['4', '5', '6', '7', '8']
+
+
+def test_result_counter_tracks_evictions(monkeypatch, new_session, paste):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '5')
+    at = new_session()
+    paste(at, paste_text(range(1, 4), 'Lose'))
+    processor = paste(at, paste_text(range(4, 9), 'Win'))
+    # The three losses were all evicted by the five later wins
+    assert processor.result_counter['Win'] == 5
+    assert processor.result_counter['Lose'] == 0
+
+
+def test_clear_data_resets_history_and_counts(new_session, paste, processor_of):
+    at = new_session()
+    paste(at, paste_text(range(1, 4)))
+    next(button for button in at.button if button.label == '🗑️ Clear Data').click().run()
+    processor = processor_of(at)
+    assert not processor.signals
+    assert processor.result_counter['Win'] == 0
+
+
+def stored_signal(period_id, result_color):
+    return {
+        'timestamp': '2025-01-01 12:00:00',
+        'period_id': str(period_id),
+        'result': 'Win',
+        'result_color': result_color,
+        'trade_color': 'Green',
+        'quantity': 1.0,
+        'phase': 1,
+    }
+
+
+def baseline_prediction(colors, window_size=5):
+    """The predictor as it was first written, over stored result colors"""
+    if len(colors) < 3:
+        return ('Analyzing...', 'Low', 0.5)
+    recent = [color for color in colors[-window_size:] if color in ('Green', 'Red')]
+    if not recent:
+        return ('Green', 'Low', 0.5)
+    green_prob = recent.count('Green') / len(recent)
+    if len(recent) >= 2 and recent[-1] == recent[-2]:
+        return ('Red' if recent[-1] == 'Green' else 'Green', 'Medium', 0.65)
+    if green_prob > 0.6:
+        return ('Green', 'Medium', green_prob)
+    if green_prob < 0.4:
+        return ('Red', 'Medium', 1 - green_prob)
+    return ('Green' if green_prob >= 0.5 else 'Red', 'Low', 0.55)
+
+
+@pytest.mark.parametrize('colors', [
+    ['Green', 'Red'],
+    ['Green', 'Red', 'Green', 'Red', 'Green'],
+    ['Red', 'Red', 'Green', 'Red', 'Red'],
+    ['Green', 'Green', 'Green', 'Red', 'Green', 'Green', 'Red'],
+    ['Red', 'Green', 'Green', None],
+    ['Green', None, 'Red', None, None],
+    [None, None, None, None],
+])
+def test_prediction_matches_the_baseline_predictor(s3, new_session, processor_of, colors):
+    s3.put_json('ETHGPT60s_bot_data.json', {
+        'signals': [stored_signal(period_id, color) for period_id, color in enumerate(colors, 1)],
+        'current_phase': 1,
+    })
+    processor = processor_of(new_session())
+
+    prediction = processor.parse_signal(block(100))['prediction']
+
+    color, confidence, probability = baseline_prediction(colors)
+    assert (prediction['color'], prediction['confidence']) == (color, confidence)
+    assert prediction['probability'] == pytest.approx(probability)
+
+
+def test_simulated_result_colors_are_green_or_red(processor):
+    colors = {processor.parse_signal(block(period_id))['result_color'] for period_id in range(200)}
+    assert colors == {'Green', 'Red'}
+
+
+def test_bet_multiplier_saturates_at_the_last_step(processor):
+    quantities = [
+        processor.parse_signal(f"📌Current period ID: {period_id}\n🔔Result:Lose💔\n📲Trade: 🟢✔️")['quantity']
+        for period_id in range(10)
+    ]
+    assert quantities == [2.5, 6.25, 15.63, 39.08, 97.62, 244.05, 610.12, 610.12, 610.12, 610.12]
+    assert processor.current_phase == 8
+
+
+def test_next_bet_metric_follows_the_phase(new_session, paste):
+    at = new_session()
+    paste(at, paste_text(range(1, 12), 'Lose'))
+    metrics = {metric.label: metric.value for metric in at.metric}
+    assert metrics['Current Phase'] == '8'
+    assert metrics['Next Bet'] == 'x610.12'
+
+
+def test_dashboard_renders_the_newest_cards_first(monkeypatch, new_session, paste):
+    monkeypatch.setenv('MAX_SIGNALS_DISPLAY', '3')
+    at = new_session()
+    paste(at, paste_text(range(1, 6)))
+    cards = next(markdown.value for markdown in at.markdown if '<b>Period:</b>' in markdown.value)
+    positions = [cards.find(f'<b>Period:</b> {period_id}<') for period_id in (5, 4, 3)]
+    assert -1 not in positions
+    assert positions == sorted(positions)
+    assert '<b>Period:</b> 2<' not in cards
+
+
+def test_oversized_blocks_are_reported_when_processed(monkeypatch, new_session, paste):
+    monkeypatch.setenv('MAX_SIGNAL_LENGTH', '300')
+    at = new_session()
+    processor = paste(at, block(1) + block(2) + '.' * 300)
+    assert period_ids(processor) == ['1']
+    assert any('Skipped 1 signals' in warning.value for warning in at.warning)
+
+
+
+def test_prediction_carries_its_display_string(new_session, paste):
+    at = new_session()
+    processor = paste(at, paste_text(range(1, 6)))
+    prediction = processor.signals[-1]['prediction']
+    assert prediction['prob_str'] == f"{prediction['probability']*100:.1f}%"
+    cards = next(markdown.value for markdown in at.markdown if '<b>Period:</b>' in markdown.value)
+    assert f"({prediction['prob_str']})" in cards
+
+
+def test_duplicate_period_ids_are_skipped_until_evicted(monkeypatch, new_session, paste):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '3')
+    at = new_session()
+    processor = paste(at, paste_text([1, 2, 2, 3]))
+    assert period_ids(processor) == ['1', '2', '3']
+    # Period 1 is evicted by 4, so pasting it again is accepted
+    processor = paste(at, paste_text([4, 3, 1]))
+    assert period_ids(processor) == ['3', '4', '1']
+
+
+def test_predictions_follow_new_results(s3, restart, processor_of, drain):
+    predictions = []
+    for color in ('Green', 'Red'):
+        s3.objects.clear()
+        s3.put_json('ETHGPT60s_bot_data.json', {
+            'signals': [stored_signal(period_id, color) for period_id in range(1, 6)],
+            'current_phase': 1,
+        })
+        at = restart()
+        drain(at)
+        predictions.append(processor_of(at).parse_signal(block(100))['prediction']['color'])
+    # Two greens in a row predict red and vice versa; the cache must not pin the first
+    assert predictions == ['Red', 'Green']
+
+
+def test_statistics_come_from_the_running_totals(new_session, paste):
+    at = new_session()
+    paste(at, paste_text([1, 2]) + '\n' + paste_text([3], 'Lose'))
+    stats = ''.join(markdown.value for markdown in at.markdown if 'stats-card' in markdown.value)
+    for label, value in (('Total', '3'), ('Wins', '2'), ('Losses', '1'), ('Win Rate', '66.7%')):
+        assert f'{label}</h4><h2>{value}</h2>' in stats
+
+
+def test_oversized_blocks_are_reported_when_queued(monkeypatch, new_session, processor_of):
+    monkeypatch.setenv('MAX_SIGNAL_LENGTH', '300')
+    at = new_session()
+    at.text_area(key='signal_input').input(block(1) + block(2) + '.' * 300)
+    at.button(key='queue_btn').click().run()
+    assert not at.exception
+    assert period_ids(processor_of(at)) == ['1']
+    assert any('Skipped 1 signals' in warning.value for warning in at.warning)
+
+
+def test_queued_signals_are_reported_after_the_drain(new_session, processor_of):
+    at = new_session()
+    at.text_area(key='signal_input').input(paste_text([1, 2]))
+    at.button(key='queue_btn').click().run()
+    assert not at.exception
+    assert period_ids(processor_of(at)) == ['1', '2']
+    assert any('Processed 2 signals' in success.value for success in at.success)
+
+
+def test_cards_show_color_emoji(new_session, paste):
+    at = new_session()
+    paste(at, block(1, trade='🔴'))
+    cards = next(markdown.value for markdown in at.markdown if '<b>Period:</b>' in markdown.value)
+    assert '<b>Trade:</b> 🔴 Red' in cards
+    assert '<b>Next:</b> ⚫ Analyzing...' in cards
+
+
+def test_color_column_follows_load_and_clear(s3, new_session, processor_of):
+    s3.put_json('ETHGPT60s_bot_data.json', {
+        'signals': [stored_signal(period_id, color) for period_id, color in enumerate(['Red'] + ['Green'] * 6, 1)],
+        'current_phase': 1,
+    })
+    at = new_session()
+    assert list(processor_of(at).recent_colors) == ['Green'] * 5
+    next(button for button in at.button if button.label == '🗑️ Clear Data').click().run()
+    assert not processor_of(at).recent_colors
+
+
+def test_styles_are_sent_with_the_header_on_every_run(new_session, paste):
+    at = new_session()
+    paste(at, block(1))
+    styled = [markdown.value for markdown in at.markdown if '<style>' in markdown.value]
+    assert len(styled) == 1
+    assert 'class="main-header"' in styled[0]
+
+
+def test_bulk_paste_is_split_at_each_block_header(new_session, paste):
+    at = new_session()
+    processor = paste(at, 'Forwarded from the channel\n\n' + paste_text([1, 2, 3]) + '\nGood luck!')
+    assert period_ids(processor) == ['1', '2', '3']
+    assert any('Found 3' in info.value for info in at.info)
+
+
+def test_rolling_counts_match_the_window_across_a_long_paste(new_session, paste):
+    processor = paste(new_session(), paste_text(range(1, 41)))
+    window = list(processor.recent_colors)
+    assert (processor._green, processor._red) == (window.count('Green'), window.count('Red'))
+
+    colors = [signal['result_color'] for signal in processor.signals]
+    for index, signal in enumerate(processor.signals):
+        prediction = signal['prediction']
+        color, confidence, probability = baseline_prediction(colors[:index])
+        assert (prediction['color'], prediction['confidence']) == (color, confidence)
+        assert prediction['probability'] == pytest.approx(probability)
+
+
+def test_refresh_banner_shows_the_configured_interval(monkeypatch, new_session):
+    monkeypatch.setenv('REFRESH_INTERVAL', '45')
+    at = new_session()
+    assert any('Auto-refresh: 45 seconds' in markdown.value for markdown in at.markdown)
+
+
+def test_legacy_records_render_cards(s3, new_session):
+    legacy = stored_signal(7, 'Red')
+    legacy['prediction'] = {'color': 'Red', 'confidence': 'Medium', 'probability': 0.65}
+    s3.put_json('ETHGPT60s_bot_data.json', {'signals': [legacy], 'current_phase': 1})
+    at = new_session()
+    cards = next(markdown.value for markdown in at.markdown if '<b>Period:</b>' in markdown.value)
+    assert '<code>12:00:00</code>' in cards
+    assert '<b>Next:</b> 🔴 Red' in cards
+    assert '(65.0%)' in cards
+
+
+def test_legacy_records_get_their_time_on_load(s3, new_session, processor_of):
+    s3.put_json('ETHGPT60s_bot_data.json', {'signals': [stored_signal(7, 'Red')], 'current_phase': 1})
+    at = new_session()
+    assert [signal['time'] for signal in processor_of(at).signals] == ['12:00:00']
+
+
+def test_manual_refresh_runs_the_page_once(monkeypatch, new_session):
+    at = new_session()
+    headers = []
+    markdown = st.markdown
+
+    def counting_markdown(body, *args, **kwargs):
+        if 'class="main-header"' in body:
+            headers.append(body)
+        return markdown(body, *args, **kwargs)
+
+    monkeypatch.setattr(st, 'markdown', counting_markdown)
+    next(button for button in at.button if button.label == '🔄 MANUAL REFRESH').click().run()
+    assert not at.exception
+    assert len(headers) == 1
+
+
+def test_simulated_colors_use_every_buffered_bit(monkeypatch, processor):
+    draws = []
+
+    def getrandbits(k):
+        draws.append(k)
+        return 0b1011
+
+    monkeypatch.setattr(random, 'getrandbits', getrandbits)
+    colors = [processor.parse_signal(block(period_id))['result_color'] for period_id in range(65)]
+    assert colors[:5] == ['Green', 'Green', 'Red', 'Green', 'Red']
+    assert draws == [64, 64]
+
+
+def test_sessions_share_one_processor(new_session, paste, processor_of):
+    first, second = new_session(), new_session()
+    assert processor_of(first) is processor_of(second)
+
+    paste(first, paste_text([1, 2]))
+    second.run()
+    metrics = {metric.label: metric.value for metric in second.metric}
+    assert metrics['Current Phase'] == '1'
+    assert any('<b>Period:</b> 2<' in markdown.value for markdown in second.markdown)
+
+
+def test_clear_data_in_one_session_clears_every_session(new_session, paste, processor_of):
+    first, second = new_session(), new_session()
+    paste(first, paste_text([1, 2]))
+    next(button for button in second.button if button.label == '🗑️ Clear Data').click().run()
+
+    first.run()
+    assert not processor_of(first).signals
+    assert any('No signals yet' in info.value for info in first.info)
+
+
+def test_dashboard_waits_for_a_batch_in_another_session(new_session, paste, processor_of):
+    at = new_session()
+    paste(at, paste_text([1]))
+    processor = processor_of(at)
+    assert processor.lock.acquire(blocking=False)
+    processor.lock.release()
+
+    rerun = threading.Thread(target=at.run, daemon=True)
+    with processor.lock:
+        rerun.start()
+        rerun.join(timeout=0.5)
+        # Another session is mid-batch, so this run waits instead of reading half of it
+        assert rerun.is_alive()
+    rerun.join(timeout=5)
+    assert not rerun.is_alive()
+    assert not at.exception
+
+
+@pytest.mark.parametrize('fields, expected', [
+    (
+        ('7', 'Win', '12:00:00', 'Green', 'Red', 2, 3.0, ('Red', 'High', '75.0%')),
+        '<div class="signal-card-win"><div class="signal-row">'
+        '<div class="signal-main"><b>Period:</b> 7<br><b>Time:</b> <code>12:00:00</code><br>'
+        '<b>Result:</b> ✅ WIN</div>'
+        '<div class="signal-details"><b>Trade:</b> 🟢 Green<br><b>Result:</b> 🔴 Red<br>'
+        '<b>Phase:</b> 2<br><b>Bet:</b> x3.0<br><b>Next:</b> 🔴 Red<br>'
+        '<div class="prediction-high">Confidence: High (75.0%)</div></div>'
+        '</div></div>',
+    ),
+    (
+        ('8', 'Lose', '12:01:00', None, None, 1, 1.0, None),
+        '<div class="signal-card-loss"><div class="signal-row">'
+        '<div class="signal-main"><b>Period:</b> 8<br><b>Time:</b> <code>12:01:00</code><br>'
+        '<b>Result:</b> ❌ LOSE</div>'
+        '<div class="signal-details"><b>Phase:</b> 1<br><b>Bet:</b> x1.0</div>'
+        '</div></div>',
+    ),
+])
+def test_signal_card_markup(processor, fields, expected):
+    render_signal_card = type(processor).save_data.__globals__['render_signal_card']
+    assert render_signal_card(fields) == expected
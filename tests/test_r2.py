@@ -0,0 +1,104 @@
+import json
+import sys
+import threading
+
+import boto3
+import pytest
+
+from test_processor import paste_text
+
+
+def test_r2_client_is_built_once_per_process(s3, monkeypatch, new_session):
+    calls = []
+
+    def client(*args, **kwargs):
+        calls.append(kwargs)
+        return s3
+
+    monkeypatch.setattr(boto3, 'client', client)
+    new_session()
+    new_session()
+    assert len(calls) == 1
+    assert calls[0]['endpoint_url'] == 'https://r2.invalid'
+    assert calls[0]['config'].tcp_keepalive
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_history_round_trips_through_r2(s3, monkeypatch, new_session, paste, processor_of, drain,
+                                       use_orjson, restart):
+    if not use_orjson:
+        # A None entry makes `import orjson` raise ImportError
+        monkeypatch.setitem(sys.modules, 'orjson', None)
+    bodies = []
+    put_object = s3.put_object
+
+    def recording_put_object(Bucket, Key, Body, ContentType=None):
+        bodies.append(Body)
+        put_object(Bucket, Key, Body, ContentType)
+
+    monkeypatch.setattr(s3, 'put_object', recording_put_object)
+    at = new_session()
+    paste(at, paste_text(range(1, 4)))
+    drain(at)
+
+    assert bodies and all(isinstance(body, bytes) for body in bodies)
+    # Both encoders write compact JSON
+    assert not any(b'", "' in body or b'": ' in body for body in bodies)
+
+    assert s3.keys('signals/') == ['signals/ETHGPT60s_bot/000000000000.ndjson']
+    lines = s3.objects['signals/ETHGPT60s_bot/000000000000.ndjson'].splitlines()
+    assert [json.loads(line)['period_id'] for line in lines] == ['1', '2', '3']
+    assert [signal['period_id'] for signal in processor_of(restart(at)).signals] == ['1', '2', '3']
+
+
+def test_superseding_a_queued_upload_does_not_deadlock(s3, monkeypatch, processor):
+    app = type(processor).save_data.__globals__
+    uploader = app['R2Uploader']()
+    release = threading.Event()
+    put_object = s3.put_object
+
+    def slow_put_object(Bucket, Key, Body, ContentType=None):
+        if Key == 'slow':
+            release.wait(5)
+        put_object(Bucket, Key, Body, ContentType)
+
+    monkeypatch.setattr(s3, 'put_object', slow_put_object)
+    uploader.submit(app['save_to_r2'], {}, 'slow')
+
+    def submit_twice():
+        uploader.submit(app['save_to_r2'], {'n': 'first'}, 'meta', key='meta')
+        uploader.submit(app['save_to_r2'], {'n': 'second'}, 'meta', key='meta')
+
+    submitter = threading.Thread(target=submit_twice, daemon=True)
+    submitter.start()
+    submitter.join(timeout=5)
+    blocked = submitter.is_alive()
+    release.set()
+
+    assert not blocked
+    uploader.submit(app['save_to_r2'], {}, 'last').result(timeout=5)
+    assert json.loads(s3.objects['meta']) == {'n': 'second'}
+
+
+def test_each_paste_is_saved_in_one_flush(s3, monkeypatch, new_session, paste, drain):
+    monkeypatch.setenv('REFRESH_INTERVAL', '3600')
+    keys = []
+    put_object = s3.put_object
+
+    def counting_put_object(Bucket, Key, Body, ContentType=None):
+        keys.append(Key)
+        put_object(Bucket, Key, Body, ContentType)
+
+    monkeypatch.setattr(s3, 'put_object', counting_put_object)
+    at = new_session()
+    paste(at, paste_text(range(1, 6)))
+    paste(at, paste_text(range(6, 9)))
+    drain(at)
+
+    # Both pastes are saved at once despite the interval, one segment each
+    signal_keys = [key for key in keys if key.startswith('signals/')]
+    assert signal_keys == s3.keys('signals/')
+    assert len(signal_keys) == 2
+    at.run()
+    drain(at)
+    assert len([key for key in keys if key.startswith('signals/')]) == 2
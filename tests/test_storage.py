@@ -0,0 +1,198 @@
+import json
+
+from test_processor import paste_text, period_ids
+
+PREFIX = 'signals/ETHGPT60s_bot/'
+LEGACY_KEY = 'ETHGPT60s_bot_data.json'
+
+
+def make_signal(period_id, result='Win'):
+    return {
+        'timestamp': '2024-01-01 12:00:00',
+        'period_id': str(period_id),
+        'result': result,
+        'result_color': 'Green',
+        'trade_color': 'Red',
+        'quantity': 1.0,
+        'phase': 1,
+    }
+
+
+def write_legacy(s3, period_ids):
+    s3.put_json(LEGACY_KEY, {'signals': [make_signal(pid) for pid in period_ids], 'current_phase': 2})
+
+
+def segment(sequence):
+    return f'{PREFIX}{sequence:012d}.ndjson'
+
+
+def segment_ids(s3, key):
+    return [json.loads(line)['period_id'] for line in s3.objects[key].splitlines()]
+
+
+def test_each_flush_writes_one_segment_with_phase_in_meta(s3, new_session, paste, drain):
+    at = new_session()
+    paste(at, paste_text(range(1, 4), 'Lose'))
+    paste(at, paste_text(range(4, 6), 'Lose'))
+    drain(at)
+
+    assert s3.keys(PREFIX) == [segment(0), segment(1)]
+    assert segment_ids(s3, segment(1)) == ['4', '5']
+    assert json.loads(s3.objects['ETHGPT60s_bot_meta.json'])['current_phase'] == 6
+
+
+def test_evicted_signals_are_deleted_from_r2(s3, monkeypatch, new_session, paste, drain, processor_of, restart):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '3')
+    at = new_session()
+    paste(at, paste_text(range(1, 4)))
+    paste(at, paste_text(range(4, 6)))
+    drain(at)
+    # Period 3 is still live, so its segment stays
+    assert s3.keys(PREFIX) == [segment(0), segment(1)]
+
+    paste(at, paste_text([6]))
+    drain(at)
+    assert s3.keys(PREFIX) == [segment(1), segment(2)]
+    assert period_ids(processor_of(restart(at))) == ['4', '5', '6']
+
+
+def test_legacy_snapshot_is_deleted_after_migration(s3, new_session, drain, processor_of, restart):
+    write_legacy(s3, range(1, 6))
+    at = new_session()
+    drain(at)
+
+    assert LEGACY_KEY not in s3.objects
+    assert s3.keys(PREFIX) == [segment(0)]
+    processor = processor_of(restart(at))
+    assert period_ids(processor) == ['1', '2', '3', '4', '5']
+    assert processor.current_phase == 2
+
+
+def test_legacy_snapshot_is_kept_when_migration_fails(s3, new_session, drain):
+    write_legacy(s3, range(1, 6))
+    s3.broken.add(segment(0))
+    drain(new_session())
+
+    assert LEGACY_KEY in s3.objects
+
+
+def test_clear_data_survives_restart_with_legacy_snapshot(s3, new_session, paste, drain, processor_of, restart):
+    at = new_session()
+    paste(at, paste_text(range(1, 4)))
+    drain(at)
+    # A snapshot left behind by an older deployment
+    write_legacy(s3, range(1, 6))
+    next(button for button in at.button if button.label == '🗑️ Clear Data').click().run()
+    drain(at)
+
+    assert LEGACY_KEY not in s3.objects
+    assert not s3.keys(PREFIX)
+    assert not processor_of(restart(at)).signals
+
+
+def test_load_keeps_period_order_and_prunes_older_objects(s3, monkeypatch, new_session, processor_of, drain):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '4')
+    for period_id in (8, 9, 10, 11, 100):
+        s3.put_json(f'{PREFIX}{period_id}.json', make_signal(period_id))
+    at = new_session()
+    drain(at)
+
+    assert period_ids(processor_of(at)) == ['9', '10', '11', '100']
+    assert f'{PREFIX}8.json' not in s3.objects
+
+
+def test_per_period_objects_load_before_segments(s3, new_session, processor_of, drain):
+    for period_id in (9, 10):
+        s3.put_json(f'{PREFIX}{period_id}.json', make_signal(period_id))
+    s3.objects[segment(0)] = b''.join(json.dumps(make_signal(pid)).encode() + b'\n' for pid in (3, 4))
+    at = new_session()
+
+    assert period_ids(processor_of(at)) == ['9', '10', '3', '4']
+    assert processor_of(at)._next_segment == 1
+
+
+def test_segments_follow_write_order_when_older_periods_arrive_late(s3, monkeypatch, new_session, paste,
+                                                                    processor_of, drain, restart):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '3')
+    at = new_session()
+    paste(at, paste_text([10, 11]))
+    paste(at, paste_text([5]))
+    paste(at, paste_text([12, 13]))
+    drain(at)
+
+    assert period_ids(processor_of(at)) == ['5', '12', '13']
+    assert s3.keys(PREFIX) == [segment(1), segment(2)]
+    assert period_ids(processor_of(restart(at))) == ['5', '12', '13']
+
+
+def test_segment_limit_compacts_the_history(s3, monkeypatch, new_session, paste, processor_of, drain, restart):
+    monkeypatch.setenv('MAX_SIGNAL_SEGMENTS', '3')
+    at = new_session()
+    for period_id in range(1, 5):
+        paste(at, paste_text([period_id]))
+    drain(at)
+
+    assert s3.keys(PREFIX) == [segment(3)]
+    assert segment_ids(s3, segment(3)) == ['1', '2', '3', '4']
+    at = restart(at)
+    paste(at, paste_text([5]))
+    drain(at)
+    assert s3.keys(PREFIX) == [segment(3), segment(4)]
+    assert period_ids(processor_of(restart(at))) == ['1', '2', '3', '4', '5']
+
+
+def test_failed_compacted_write_keeps_the_older_segments(s3, monkeypatch, new_session, paste, processor_of,
+                                                        drain, restart):
+    monkeypatch.setenv('MAX_SIGNAL_SEGMENTS', '3')
+    s3.broken.add(segment(3))
+    at = new_session()
+    for period_id in range(1, 5):
+        paste(at, paste_text([period_id]))
+    drain(at)
+
+    assert s3.keys(PREFIX) == [segment(0), segment(1), segment(2)]
+    s3.broken.clear()
+    assert period_ids(processor_of(restart(at))) == ['1', '2', '3']
+
+
+def test_copies_left_by_a_failed_compaction_delete_load_once(s3, monkeypatch, new_session, paste,
+                                                            processor_of, drain, restart):
+    monkeypatch.setenv('MAX_SIGNAL_SEGMENTS', '3')
+    at = new_session()
+    for period_id in range(1, 4):
+        paste(at, paste_text([period_id]))
+    drain(at)
+    # The compacted segment is written, but deleting the old ones fails
+    s3.broken.add(segment(0))
+    paste(at, paste_text([4]))
+    drain(at)
+    assert s3.keys(PREFIX) == [segment(0), segment(1), segment(2), segment(3)]
+
+    s3.broken.clear()
+    at = restart(at)
+    drain(at)
+    assert period_ids(processor_of(at)) == ['1', '2', '3', '4']
+    # The stale copies are deleted once the newest ones are loaded
+    assert s3.keys(PREFIX) == [segment(3)]
+
+
+def test_unreadable_segment_is_logged_and_deleted_with_its_slot(s3, monkeypatch, caplog, new_session, paste,
+                                                                processor_of, drain, restart):
+    monkeypatch.setenv('MAX_SIGNALS_HISTORY', '3')
+    at = new_session()
+    paste(at, paste_text([1]))
+    paste(at, paste_text([2, 3]))
+    drain(at)
+
+    s3.broken.add(segment(0))
+    at = restart(at)
+    drain(at)
+    assert period_ids(processor_of(at)) == ['2', '3']
+    assert 'Could not read 1 of 2 signal segments' in caplog.text
+
+    s3.broken.clear()
+    paste(at, paste_text([4, 5]))
+    drain(at)
+    # Evicting period 2 reaches past the unread segment, so it goes too
+    assert s3.keys(PREFIX) == [segment(1), segment(2)]
+    assert period_ids(processor_of(restart(at))) == ['3', '4', '5']